@@ -1,34 +1,90 @@
 import json
 import hashlib
 import os
-import boto3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
 from urllib.parse import unquote_plus
-from datetime import datetime, timezone
+
 from botocore.exceptions import ClientError
 
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(os.environ.get("JOB_TABLE", "IngestJobs"))
+import aws_clients
+
+try:
+    import orjson  # optional: C-speed serialization
+except ImportError:
+    orjson = None
+
+ddb = aws_clients.DDB
+JOB_TABLE = os.environ.get("JOB_TABLE", "IngestJobs")
 
-sfn = boto3.client("stepfunctions")
 STATE_MACHINE_ARN = os.environ.get("STATE_MACHINE_ARN")
 
+# When set, StartExecution is left to ingest-start-execution (DynamoDB Streams
+# INSERT on the jobs table) and this handler returns right after the write.
+DEFER_START_EXECUTION = os.environ.get("DEFER_START_EXECUTION", "0") == "1"
+
+MARKER = "_INGEST_DONE"
+
+# Concurrent markers per SQS batch; matches aws_clients max_pool_connections
+BATCH_WORKERS = 10
+
+# Cutover from the SHA-256 job_id: folders ingested before the switch keep
+# their old row, so look it up before creating a new one. Turn off (0) once
+# no legacy folder can receive another marker.
+LEGACY_JOB_ID_LOOKUP = os.environ.get("LEGACY_JOB_ID_LOOKUP", "1") == "1"
+
+# Conditional create; built once and reused by every invocation.
+CREATE_COND_EXPR = "attribute_not_exists(#pk)"
+CREATE_COND_NAMES = {"#pk": "job_id"}
+
+
+def serialize_input(execution_input: Dict[str, Any]) -> str:
+    # Compact JSON: execution input size counts toward the SFN payload limit
+    if orjson is not None:
+        return orjson.dumps(execution_input).decode("utf-8")
+    return json.dumps(execution_input, separators=(",", ":"))
+
 
 def now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    t = time.time()
+    s = time.gmtime(t)
+    us = int((t - int(t)) * 1_000_000)
+    return (
+        f"{s.tm_year:04d}-{s.tm_mon:02d}-{s.tm_mday:02d}"
+        f"T{s.tm_hour:02d}:{s.tm_min:02d}:{s.tm_sec:02d}.{us:06d}Z"
+    )
 
 
+# Re-delivered markers (S3 is at-least-once) hit the cache across warm invokes
+@lru_cache(maxsize=256)
 def generate_job_id(project_code: str, folder_path: str) -> str:
+    # Deterministic key only (no crypto threat model): 128-bit BLAKE2b.
+    # Stays a hex string: it is the IngestJobs hash key (type S), the SFN
+    # execution name and part of the manifest/report S3 keys.
+    raw = f"{project_code}:{folder_path}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=256)
+def legacy_job_id(project_code: str, folder_path: str) -> str:
+    # Pre-BLAKE2b scheme; still the key of rows created before the switch
     raw = f"{project_code}:{folder_path}"
     return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
 
 def handler(event, context):
-    if not STATE_MACHINE_ARN:
+    if not STATE_MACHINE_ARN and not DEFER_START_EXECUTION:
         raise RuntimeError("Missing required environment variable: STATE_MACHINE_ARN")
 
-    # 1) Extract S3 info + decode key
+    records = event.get("Records") or []
+    if records and records[0].get("eventSource") == "aws:sqs":
+        return handle_sqs_batch(records)
+
+    # 1) Extract S3 info + decode key (direct S3 → Lambda trigger)
     try:
-        record = event["Records"][0]
+        record = records[0]
         bucket = record["s3"]["bucket"]["name"]
         raw_key = record["s3"]["object"]["key"]
         object_key = unquote_plus(raw_key)
@@ -36,63 +92,158 @@ def handler(event, context):
         print("Invalid event structure", err, event)
         return {"status": "error", "message": "Invalid event structure"}
 
+    return process_marker(bucket, object_key)
+
+
+def handle_sqs_batch(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    S3 → SQS → Lambda batch: each SQS body wraps an S3 event notification.
+    Markers are de-duplicated across the batch and processed concurrently.
+    Failed messages are reported via batchItemFailures (requires
+    ReportBatchItemFailures on the event source mapping) so only they are
+    retried.
+    """
+    # (bucket, object_key) -> SQS message ids carrying that marker
+    markers: Dict[Tuple[str, str], List[str]] = {}
+
+    for msg in records:
+        try:
+            body = json.loads(msg["body"])
+        except (KeyError, ValueError) as err:
+            # not retryable; let it go rather than poison the batch
+            print("Invalid SQS message", err, msg.get("messageId"))
+            continue
+
+        if not isinstance(body, dict):
+            print("Invalid SQS message body (not a JSON object)", msg.get("messageId"))
+            continue
+
+        s3_records = body.get("Records")
+        if not isinstance(s3_records, list):
+            # s3:TestEvent is sent once when the notification is configured;
+            # anything else (e.g. an SNS envelope) is unexpected, so log it
+            if body.get("Event") != "s3:TestEvent":
+                print("SQS message has no S3 Records", msg.get("messageId"))
+            continue
+
+        for record in s3_records:
+            try:
+                bucket = record["s3"]["bucket"]["name"]
+                object_key = unquote_plus(record["s3"]["object"]["key"])
+            except (KeyError, TypeError) as err:
+                print("Invalid S3 record in SQS message", err, msg.get("messageId"))
+                continue
+            markers.setdefault((bucket, object_key), []).append(msg["messageId"])
+
+    results: List[Dict[str, Any]] = []
+    failed_ids: List[str] = []
+
+    if markers:
+        with ThreadPoolExecutor(max_workers=min(BATCH_WORKERS, len(markers))) as pool:
+            futures = {pool.submit(process_marker, b, k): ids for (b, k), ids in markers.items()}
+            for future, ids in futures.items():
+                try:
+                    results.append(future.result())
+                except Exception as err:
+                    print("Failed to process marker", err, ids)
+                    failed_ids.extend(ids)
+
+    return {
+        "batchItemFailures": [{"itemIdentifier": i} for i in failed_ids],
+        "results": results,
+    }
+
+
+def touch_existing_job(
+    job_id: str, existing: Dict[str, Any], object_key: str, ingest_folder: str
+) -> Dict[str, Any]:
+    # 7) Duplicate → only touch last_seen* if a different marker fired;
+    #    idempotent re-delivery of the same marker costs no extra write
+    seen_key = (existing.get("last_seen_object_key") or {}).get("S")
+    if seen_key != object_key:
+        print(f"Job exists, updating timestamp: {job_id}")
+        ddb.update_item(
+            TableName=JOB_TABLE,
+            Key={"job_id": {"S": job_id}},
+            UpdateExpression="SET last_seen_at = :t, last_seen_object_key = :k",
+            ExpressionAttributeValues={":t": {"S": now_iso()}, ":k": {"S": object_key}},
+        )
+    else:
+        print(f"Job exists, same marker re-delivered: {job_id}")
+
+    return {
+        "status": "duplicate_ingest_done_ignored",
+        "job_id": job_id,
+        "ingest_folder": ingest_folder,
+    }
+
+
+def process_marker(bucket: str, object_key: str) -> Dict[str, Any]:
     # 2) Guard: only react to _INGEST_DONE
-    if not object_key.endswith("_INGEST_DONE"):
+    if not object_key.endswith(MARKER):
         print(f"Ignored: {object_key}")
         return {"status": "ignored", "reason": "not_ingest_done_marker"}
 
     # 3) Guard: must be inside a folder
-    if "/" not in object_key:
+    slash = object_key.rfind("/")
+    if slash < 0:
         print(f"Ignored root file: {object_key}")
         return {"status": "ignored", "reason": "file_in_root"}
 
-    folder_path = object_key.rsplit("/", 1)[0] + "/"
-    project_code = folder_path.split("/", 1)[0]
+    folder_path = object_key[: slash + 1]
+    project_code = object_key.partition("/")[0]
 
     job_id = generate_job_id(project_code, folder_path)
     current_ts = now_iso()
 
+    ingest_folder = f"s3://{bucket}/{folder_path}"
+
     job_item = {
-        "job_id": job_id,
-        "project_code": project_code,
-        "ingest_folder": f"s3://{bucket}/{folder_path}",
-        "state": "CREATED",
-        "trigger": "_INGEST_DONE",
-        "created_at": current_ts,
-        "last_seen_at": current_ts,
-        "last_seen_object_key": object_key,
-        "ruleset_version": "v1.0",
+        "job_id": {"S": job_id},
+        "project_code": {"S": project_code},
+        "ingest_folder": {"S": ingest_folder},
+        "state": {"S": "CREATED"},
+        "trigger": {"S": MARKER},
+        "created_at": {"S": current_ts},
+        "last_seen_at": {"S": current_ts},
+        "last_seen_object_key": {"S": object_key},
+        "ruleset_version": {"S": "v1.0"},
     }
 
-    # 6) Create job only if not exists
-    created_new = False
+    # 5) Legacy row for this folder → same duplicate handling, no new job
+    if LEGACY_JOB_ID_LOOKUP:
+        old_id = legacy_job_id(project_code, folder_path)
+        legacy = ddb.get_item(
+            TableName=JOB_TABLE,
+            Key={"job_id": {"S": old_id}},
+            ProjectionExpression="job_id, last_seen_object_key",
+        ).get("Item")
+        if legacy:
+            return touch_existing_job(old_id, legacy, object_key, ingest_folder)
+
+    # 6) Create job only if not exists. On a duplicate, ALL_OLD hands back
+    #    the existing row in the error, so no follow-up GetItem is needed.
     try:
-        table.put_item(
+        ddb.put_item(
+            TableName=JOB_TABLE,
             Item=job_item,
-            ConditionExpression="attribute_not_exists(#pk)",
-            ExpressionAttributeNames={"#pk": "job_id"},
+            ConditionExpression=CREATE_COND_EXPR,
+            ExpressionAttributeNames=CREATE_COND_NAMES,
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
         )
-        created_new = True
-        print(f"New job created: {job_id}")
     except ClientError as e:
-        if e.response["Error"]["Code"] == "ConditionalCheckFailedException":
-            created_new = False
-        else:
+        if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
             raise
+        existing = e.response.get("Item") or {}
+        return touch_existing_job(job_id, existing, object_key, ingest_folder)
 
-    # 7) Duplicate → only update last_seen*
-    if not created_new:
-        seen_ts = now_iso()
-        print(f"Job exists, updating timestamp: {job_id}")
-        table.update_item(
-            Key={"job_id": job_id},
-            UpdateExpression="SET last_seen_at = :t, last_seen_object_key = :k",
-            ExpressionAttributeValues={":t": seen_ts, ":k": object_key},
-        )
+    print(f"New job created: {job_id}")
+
+    if DEFER_START_EXECUTION:
         return {
-            "status": "duplicate_ingest_done_ignored",
+            "status": "job_created_execution_deferred",
             "job_id": job_id,
-            "ingest_folder": job_item["ingest_folder"],
+            "ingest_folder": ingest_folder,
         }
 
     # 8) Start Step Functions for new job
@@ -102,16 +253,16 @@ def handler(event, context):
         "bucket": bucket,
         "object_key": object_key,
         "folder_path": folder_path,
-        "ingest_folder": job_item["ingest_folder"],
-        "trigger": job_item["trigger"],
-        "created_at": job_item["created_at"],
+        "ingest_folder": ingest_folder,
+        "trigger": MARKER,
+        "created_at": current_ts,
     }
 
     try:
-        resp = sfn.start_execution(
+        resp = aws_clients.SFN.start_execution(
             stateMachineArn=STATE_MACHINE_ARN,
             name=job_id,
-            input=json.dumps(execution_input),
+            input=serialize_input(execution_input),
         )
         return {
             "status": "job_created_and_execution_started",
@@ -124,14 +275,15 @@ def handler(event, context):
             return {"status": "job_created_but_execution_already_exists", "job_id": job_id}
 
         # Optional but recommended: mark the job as failed to start orchestration
-        table.update_item(
-            Key={"job_id": job_id},
+        ddb.update_item(
+            TableName=JOB_TABLE,
+            Key={"job_id": {"S": job_id}},
             UpdateExpression="SET #s = :s, start_error = :e, last_seen_at = :t",
             ExpressionAttributeNames={"#s": "state"},
             ExpressionAttributeValues={
-                ":s": "ERROR_STARTING",
-                ":e": e.response["Error"],
-                ":t": now_iso(),
+                ":s": {"S": "ERROR_STARTING"},
+                ":e": {"M": {k: {"S": str(v)} for k, v in e.response["Error"].items()}},
+                ":t": {"S": now_iso()},
             },
         )
         raise
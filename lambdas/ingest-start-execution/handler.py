@@ -0,0 +1,179 @@
+import json
+import os
+import time
+from typing import Any, Dict
+
+from botocore.exceptions import ClientError
+
+import aws_clients
+
+try:
+    import orjson  # optional: C-speed serialization
+except ImportError:
+    orjson = None
+
+ddb = aws_clients.DDB
+JOB_TABLE = os.environ.get("JOB_TABLE", "IngestJobs")
+
+sfn = aws_clients.SFN
+STATE_MACHINE_ARN = os.environ.get("STATE_MACHINE_ARN")
+
+# StartExecution errors worth a stream retry; anything else marks the job
+# ERROR_STARTING and is not retried
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "Throttling",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "InternalFailure",
+    "RequestTimeout",
+}
+
+
+def serialize_input(execution_input: Dict[str, Any]) -> str:
+    # Compact JSON: execution input size counts toward the SFN payload limit
+    if orjson is not None:
+        return orjson.dumps(execution_input).decode("utf-8")
+    return json.dumps(execution_input, separators=(",", ":"))
+
+
+def now_iso() -> str:
+    t = time.time()
+    s = time.gmtime(t)
+    us = int((t - int(t)) * 1_000_000)
+    return (
+        f"{s.tm_year:04d}-{s.tm_mon:02d}-{s.tm_mday:02d}"
+        f"T{s.tm_hour:02d}:{s.tm_min:02d}:{s.tm_sec:02d}.{us:06d}Z"
+    )
+
+
+def build_execution_input(image: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Rebuilds the ingest-on-done-create-job execution input from the new
+    job row (low-level AttributeValue image).
+
+    Raises KeyError if a required attribute is missing or not a string (S),
+    ValueError if ingest_folder is not an s3:// URI or the marker key is empty.
+    """
+    row = {k: v["S"] for k, v in image.items() if isinstance(v, dict) and "S" in v}
+
+    ingest_folder = row["ingest_folder"]
+    if not ingest_folder.startswith("s3://"):
+        raise ValueError(f"ingest_folder is not an s3:// URI: {ingest_folder}")
+    bucket, _, folder_path = ingest_folder[len("s3://"):].partition("/")
+
+    if not row["last_seen_object_key"]:
+        raise ValueError("last_seen_object_key is empty")
+
+    return {
+        "job_id": row["job_id"],
+        "project_code": row["project_code"],
+        "bucket": bucket,
+        "object_key": row["last_seen_object_key"],
+        "folder_path": folder_path,
+        "ingest_folder": ingest_folder,
+        "trigger": row["trigger"],
+        "created_at": row["created_at"],
+    }
+
+
+def start_execution(execution_input: Dict[str, Any]) -> bool:
+    """
+    Starts the execution; returns False if it failed for good (row marked
+    ERROR_STARTING). Retryable errors are re-raised without touching the row
+    so the stream retry can still start the job cleanly.
+    """
+    job_id = execution_input["job_id"]
+
+    try:
+        resp = sfn.start_execution(
+            stateMachineArn=STATE_MACHINE_ARN,
+            name=job_id,
+            input=serialize_input(execution_input),
+        )
+        print(f"Execution started for {job_id}: {resp.get('executionArn')}")
+        return True
+    except ClientError as e:
+        code = e.response["Error"]["Code"]
+        if code == "ExecutionAlreadyExists":
+            print(f"SFN Execution already exists for {job_id}")
+            return True
+
+        if code in RETRYABLE_ERROR_CODES:
+            raise
+
+        # Not going to succeed on retry: mark the job as failed to start
+        # orchestration (same as the inline path) and move on
+        print(f"Failed to start execution for {job_id}: {code}")
+        ddb.update_item(
+            TableName=JOB_TABLE,
+            Key={"job_id": {"S": job_id}},
+            UpdateExpression="SET #s = :s, start_error = :e, last_seen_at = :t",
+            ExpressionAttributeNames={"#s": "state"},
+            ExpressionAttributeValues={
+                ":s": {"S": "ERROR_STARTING"},
+                ":e": {"M": {k: {"S": str(v)} for k, v in e.response["Error"].items()}},
+                ":t": {"S": now_iso()},
+            },
+        )
+        return False
+
+
+def handler(event, context):
+    """
+    DynamoDB Streams trigger on the IngestJobs table (NEW_IMAGE), used when
+    ingest-on-done-create-job runs with DEFER_START_EXECUTION=1.
+    Only INSERTs start an execution; MODIFY/REMOVE records are skipped.
+
+    INSERTs that are not CREATED create-job rows are logged and skipped.
+    Non-retryable StartExecution errors mark the job ERROR_STARTING and are
+    skipped. Stops at the first retryable failure and reports it via batchItemFailures
+    (requires ReportBatchItemFailures on the event source mapping), so the
+    stream resumes from that record.
+    """
+    if not STATE_MACHINE_ARN:
+        raise RuntimeError("Missing required environment variable: STATE_MACHINE_ARN")
+
+    started = 0
+
+    for record in event.get("Records") or []:
+        if record.get("eventName") != "INSERT":
+            continue
+
+        stream = record.get("dynamodb") or {}
+
+        # Rows not written by create-job (e.g. an update_item that created
+        # the row, or a manual put) can never start; skip rather than block
+        # the shard on retries.
+        keys = stream.get("Keys")
+        image = stream.get("NewImage")
+        if not isinstance(image, dict):
+            print("Skipping INSERT without NewImage", keys)
+            continue
+
+        state = (image.get("state") or {}).get("S")
+        if state != "CREATED":
+            print(f"Skipping INSERT with state {state!r} (not CREATED)", keys)
+            continue
+
+        try:
+            execution_input = build_execution_input(image)
+        except (KeyError, ValueError) as err:
+            print("Skipping INSERT that is not a create-job row", repr(err), keys)
+            continue
+
+        try:
+            if start_execution(execution_input):
+                started += 1
+        except ClientError as err:
+            # retryable (throttling / service-side); row left untouched
+            print("Failed to start execution, will retry", err, keys)
+            return {
+                "batchItemFailures": [
+                    {"itemIdentifier": stream["SequenceNumber"]}
+                ],
+            }
+
+    return {"batchItemFailures": [], "started": started}
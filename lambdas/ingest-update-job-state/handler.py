@@ -1,25 +1,26 @@
 import os
-from datetime import datetime, timezone
+import time
 from decimal import Decimal
 from typing import Any, Dict, List
 
-import boto3
+from boto3.dynamodb.types import TypeSerializer
 
-dynamodb = boto3.resource("dynamodb")
-table = dynamodb.Table(os.environ.get("JOB_TABLE", "IngestJobs"))
+import aws_clients
 
+ddb = aws_clients.DDB
+JOB_TABLE = os.environ.get("JOB_TABLE", "IngestJobs")
 
-def now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+_serializer = TypeSerializer()
 
 
-def get_nested(dct: Dict[str, Any], path: List[str], default: Any = None) -> Any:
-    cur: Any = dct
-    for p in path:
-        if not isinstance(cur, dict) or p not in cur:
-            return default
-        cur = cur[p]
-    return cur
+def now_iso() -> str:
+    t = time.time()
+    s = time.gmtime(t)
+    us = int((t - int(t)) * 1_000_000)
+    return (
+        f"{s.tm_year:04d}-{s.tm_mon:02d}-{s.tm_mday:02d}"
+        f"T{s.tm_hour:02d}:{s.tm_min:02d}:{s.tm_sec:02d}.{us:06d}Z"
+    )
 
 
 def to_dynamodb_compatible(value: Any) -> Any:
@@ -116,23 +117,26 @@ def handler(event, context):
     # Support BOTH payload styles:
     # (A) New style: { job_id, new_state, ... }
     # (B) v1/v1-1 style: { policy: { job_id, state: { next } ... }, impl: {...} }
-    job_id = get_nested(event, ["policy", "job_id"]) or event.get("job_id")
-    new_state = get_nested(event, ["policy", "state", "next"]) or event.get("new_state")
+    policy = event.get("policy") or {}
+    impl = event.get("impl") or {}
+    impl_event = impl.get("event") or {}
+    orchestration = impl.get("orchestration") or {}
+
+    job_id = policy.get("job_id") or event.get("job_id")
+    new_state = (policy.get("state") or {}).get("next") or event.get("new_state")
 
     if not job_id or not new_state:
         raise ValueError("job_id and new_state are required.")
 
-    ruleset_version = get_nested(event, ["policy", "ruleset_version"]) or event.get("ruleset_version")
-    project_code = get_nested(event, ["policy", "project_code"]) or event.get("project_code")
-    trigger = get_nested(event, ["impl", "event", "trigger"]) or event.get("trigger")
-    execution_id = get_nested(event, ["impl", "orchestration", "execution_id"]) or event.get("execution_id")
-    entered_time = get_nested(event, ["impl", "orchestration", "entered_time"]) or event.get("entered_time")
+    ruleset_version = policy.get("ruleset_version") or event.get("ruleset_version")
+    project_code = policy.get("project_code") or event.get("project_code")
+    trigger = impl_event.get("trigger") or event.get("trigger")
+    execution_id = orchestration.get("execution_id") or event.get("execution_id")
+    entered_time = orchestration.get("entered_time") or event.get("entered_time")
 
     # Optional persistence fields already being sent by ASL
-    manifest_s3_uri = (
-        get_nested(event, ["results", "manifest", "Payload", "manifest_s3_uri"])
-        or event.get("manifest_s3_uri")
-    )
+    manifest_payload = ((event.get("results") or {}).get("manifest") or {}).get("Payload") or {}
+    manifest_s3_uri = manifest_payload.get("manifest_s3_uri") or event.get("manifest_s3_uri")
     deep_validation_summary = event.get("deep_validation_summary")
     validation_errors = event.get("validation_errors")
     policy_reason = event.get("policy_reason")
@@ -147,13 +151,20 @@ def handler(event, context):
         "at": ts,
         "to": new_state,
         "by": "stepfunctions",
-        "project_code": project_code,
-        "trigger": trigger,
-        "execution_id": execution_id,
-        "entered_time": entered_time,
-        "ruleset_version": ruleset_version,
     }
 
+    # Only persist metadata that is actually present; state_history grows on
+    # every transition and counts toward the 400KB item limit
+    for name, value in (
+        ("project_code", project_code),
+        ("trigger", trigger),
+        ("execution_id", execution_id),
+        ("entered_time", entered_time),
+        ("ruleset_version", ruleset_version),
+    ):
+        if value is not None:
+            history_entry[name] = value
+
     if policy_reason is not None:
         history_entry["policy_reason"] = policy_reason
 
@@ -199,10 +210,12 @@ def handler(event, context):
 
     update_expr = "SET " + ", ".join(update_parts)
 
-    expr_vals = to_dynamodb_compatible(expr_vals)
+    # Low-level client takes AttributeValues; history/summaries are nested maps
+    expr_vals = {k: _serializer.serialize(to_dynamodb_compatible(v)) for k, v in expr_vals.items()}
 
-    table.update_item(
-        Key={"job_id": job_id},
+    ddb.update_item(
+        TableName=JOB_TABLE,
+        Key={"job_id": {"S": job_id}},
         UpdateExpression=update_expr,
         ExpressionAttributeNames=expr_names,
         ExpressionAttributeValues=expr_vals,
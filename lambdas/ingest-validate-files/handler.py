@@ -1,84 +1,196 @@
 import json
 import os
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
 
-import boto3
+import aws_clients
 
-s3 = boto3.client("s3")
+# Larger pool: list_all_objects fans out up to len(SHARD_BOUNDARIES) requests
+s3 = aws_clients.get_client("s3", max_pool_connections=32)
 
 # Optional guardrails
 MAX_KEYS = int(os.environ.get("MAX_KEYS", "5000"))         # cap listing for safety
 ALLOW_ZERO_BYTE = os.environ.get("ALLOW_ZERO_BYTE", "0") == "1"
 
+# Split points (first char after the prefix) for concurrent listing of large
+# folders; one worker per range, so keep len() below max_pool_connections.
+SHARD_BOUNDARIES = "048AEIMQUYaeimqu"
+
+_OBJECT_FIELDS = itemgetter("Key", "Size", "ETag", "LastModified")
+
 
 def now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+    t = time.time()
+    s = time.gmtime(t)
+    us = int((t - int(t)) * 1_000_000)
+    return (
+        f"{s.tm_year:04d}-{s.tm_mon:02d}-{s.tm_mday:02d}"
+        f"T{s.tm_hour:02d}:{s.tm_min:02d}:{s.tm_sec:02d}.{us:06d}Z"
+    )
+
+
+def list_key_range(
+    bucket: str,
+    prefix: str,
+    ranges: List[Tuple[str, Optional[str]]],
+    index: int,
+    limit: int,
+    shards: List[List[Dict[str, Any]]],
+    done: List[threading.Event],
+) -> None:
+    """
+    Lists keys under prefix in ranges[index] = (start_after, end_at] into
+    shards[index]; end_at=None means no upper bound. Sets done[index] when
+    finished.
+
+    Every shard fetches its first page right away. Further pages are only
+    requested once all earlier shards are done, and not at all if the
+    earlier shards already hold limit keys (theirs sort first, so nothing in
+    this range can make the cut). Total calls stay within
+    len(ranges) + ceil(limit / 1000).
+    """
+    start_after, end_at = ranges[index]
+    items = shards[index]
+    preceding = shards[:index]
+    kwargs = {"Bucket": bucket, "Prefix": prefix, "StartAfter": start_after}
+
+    try:
+        first_page = True
+        while True:
+            if not first_page:
+                for event in done[:index]:
+                    event.wait()
+            first_page = False
+
+            held = len(items) + sum(map(len, preceding))
+            if held >= limit:
+                return
+
+            kwargs["MaxKeys"] = min(1000, limit - held)
+            resp = s3.list_objects_v2(**kwargs)
+            contents = resp.get("Contents", [])
+
+            if end_at is not None and contents and contents[-1]["Key"] > end_at:
+                # page ran into the next shard's range
+                items.extend(o for o in contents if o["Key"] <= end_at)
+                return
+
+            items.extend(contents)
+
+            if not resp.get("IsTruncated"):
+                return
+
+            kwargs["ContinuationToken"] = resp.get("NextContinuationToken")
+    finally:
+        done[index].set()
 
 
 def list_all_objects(bucket: str, prefix: str, max_keys: int) -> List[Dict[str, Any]]:
     """
     Lists objects under prefix (paginated), up to max_keys total.
     Returns raw S3 objects (dicts with Key, Size, ETag, LastModified, etc.)
+
+    The first page is fetched directly. If the listing is truncated, the rest
+    of the key space is split at SHARD_BOUNDARIES and the shards are listed
+    concurrently, then concatenated in key order (same result as the serial
+    ContinuationToken walk). Beyond each shard's first page only the earliest
+    unfinished shard keeps paging, so max_keys still bounds the LIST calls
+    (see list_key_range).
     """
-    items: List[Dict[str, Any]] = []
-    token = None
+    resp = s3.list_objects_v2(Bucket=bucket, Prefix=prefix, MaxKeys=1000)
+    items: List[Dict[str, Any]] = resp.get("Contents", [])
 
-    while True:
-        kwargs = {"Bucket": bucket, "Prefix": prefix, "MaxKeys": 1000}
-        if token:
-            kwargs["ContinuationToken"] = token
+    if len(items) >= max_keys:
+        # hard stop to protect cost/time if someone drops huge folder
+        return items[:max_keys]
 
-        resp = s3.list_objects_v2(**kwargs)
-        contents = resp.get("Contents", [])
-        items.extend(contents)
+    if not resp.get("IsTruncated") or not items:
+        return items
 
-        if len(items) >= max_keys:
-            # hard stop to protect cost/time if someone drops huge folder
-            return items[:max_keys]
+    last_key = items[-1]["Key"]
+    bounds = [last_key] + [prefix + c for c in SHARD_BOUNDARIES if prefix + c > last_key]
+    ranges = list(zip(bounds, bounds[1:] + [None]))
+    remaining = max_keys - len(items)
 
-        if resp.get("IsTruncated"):
-            token = resp.get("NextContinuationToken")
-            continue
+    shards: List[List[Dict[str, Any]]] = [[] for _ in ranges]
+    done = [threading.Event() for _ in ranges]
 
-        return items
+    # No more listings in flight than the serial walk would need pages;
+    # shards submitted later find the cap filled and return without a call
+    workers = min(len(ranges), -(-remaining // 1000))
 
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(list_key_range, bucket, prefix, ranges, i, remaining, shards, done)
+            for i in range(len(ranges))
+        ]
+        for future in futures:
+            future.result()
 
-def validate_objects(objects: List[Dict[str, Any]], marker_key: str) -> Tuple[bool, List[str]]:
+    for shard in shards:
+        items.extend(shard)
+
+    return items[:max_keys]
+
+
+def validate_objects(
+    objects: List[Dict[str, Any]], marker_key: str
+) -> Tuple[bool, List[str], List[Dict[str, Any]]]:
     """
-    Basic structural validation:
+    Basic structural validation + deterministic inventory, in one pass:
     - folder not empty (excluding marker)
     - no missing metadata we rely on
     - optionally enforce non-zero size
+    Expects objects sorted by Key; returns (ok, errors, inventory).
     """
     errors: List[str] = []
+    inventory: List[Dict[str, Any]] = []
+    add_error = errors.append
+    add_item = inventory.append
+    check_zero = not ALLOW_ZERO_BYTE
 
-    # Exclude marker file from payload set
-    payload = [o for o in objects if o.get("Key") != marker_key]
-
-    if len(payload) == 0:
-        errors.append("EMPTY_FOLDER: no payload objects found (excluding _INGEST_DONE)")
-        return False, errors
+    # Pull the four fields we use as tuples in C (itemgetter); S3 always
+    # returns them, so the .get() path only runs for malformed listings.
+    try:
+        rows = list(map(_OBJECT_FIELDS, objects))
+    except KeyError:
+        rows = [(o.get("Key"), o.get("Size"), o.get("ETag"), o.get("LastModified")) for o in objects]
 
-    for o in payload:
-        key = o.get("Key")
-        size = o.get("Size")
-        etag = o.get("ETag")
+    for key, size, etag, last_modified in rows:
+        if key == marker_key:
+            # Exclude marker file from payload set
+            continue
 
         if not key:
-            errors.append("BAD_OBJECT: missing Key")
+            add_error("BAD_OBJECT: missing Key")
             continue
 
         if size is None:
-            errors.append(f"BAD_OBJECT: missing Size ({key})")
-        elif (not ALLOW_ZERO_BYTE) and size == 0:
-            errors.append(f"ZERO_BYTE_OBJECT: {key}")
+            add_error(f"BAD_OBJECT: missing Size ({key})")
+        elif check_zero and size == 0:
+            add_error(f"ZERO_BYTE_OBJECT: {key}")
 
         # ETag is useful for minimal integrity checks later
         if not etag:
-            errors.append(f"BAD_OBJECT: missing ETag ({key})")
+            add_error(f"BAD_OBJECT: missing ETag ({key})")
 
-    return (len(errors) == 0), errors
+        # Keep it compact: Key, Size, ETag, LastModified
+        add_item(
+            {
+                "key": key,
+                "size": int(size) if size is not None else 0,
+                "etag": etag,
+                "last_modified": last_modified.isoformat() if last_modified else None,
+            }
+        )
+
+    if not inventory and not errors:
+        errors.append("EMPTY_FOLDER: no payload objects found (excluding _INGEST_DONE)")
+
+    return (len(errors) == 0), errors, inventory
 
 
 def handler(event, context):
@@ -122,27 +234,15 @@ def handler(event, context):
             "errors": [f"No objects found under prefix: {prefix}"],
         }
 
-    # 2) Validate
-    ok, errors = validate_objects(objects=objects, marker_key=marker_key)
-
-    # 3) Build deterministic inventory snapshot (for manifest step)
-    # Keep it compact: Key, Size, ETag, LastModified
-    inventory = []
-    for o in objects:
-        k = o.get("Key")
-        if not k or k == marker_key:
-            continue
-        inventory.append(
-            {
-                "key": k,
-                "size": int(o.get("Size", 0)),
-                "etag": o.get("ETag"),
-                "last_modified": o.get("LastModified").isoformat() if o.get("LastModified") else None,
-            }
-        )
+    # Sort for determinism (S3 already lists in key order, so this is ~O(n)).
+    # A keyless object must still reach validate_objects as BAD_OBJECT.
+    try:
+        objects.sort(key=itemgetter("Key"))
+    except KeyError:
+        objects.sort(key=lambda o: o.get("Key") or "")
 
-    # Sort for determinism
-    inventory.sort(key=lambda x: x["key"])
+    # 2) Validate + build deterministic inventory snapshot (for manifest step)
+    ok, errors, inventory = validate_objects(objects=objects, marker_key=marker_key)
 
     return {
         "ok": ok,
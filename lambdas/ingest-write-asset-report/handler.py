@@ -1,6 +1,7 @@
 
 # ingest-write-asset-report_handler_v1_probe_expanded
 
+import gzip
 import json
 import os
 from datetime import datetime, timezone
@@ -70,7 +71,11 @@ def get_nested(dct: Dict[str, Any], path: List[str], default: Any = None) -> Any
 def load_json_from_s3_uri(uri: str) -> Dict[str, Any]:
     bucket, key = parse_s3_uri(uri)
     response = s3.get_object(Bucket=bucket, Key=key)
-    return json.loads(response["Body"].read().decode("utf-8"))
+    body = response["Body"].read()
+    # manifests are written gzip'd; boto3 does not decode Content-Encoding
+    if response.get("ContentEncoding") == "gzip":
+        body = gzip.decompress(body)
+    return json.loads(body.decode("utf-8"))
 
 
 def load_job_row(job_id: str) -> Dict[str, Any]:
@@ -1,35 +1,39 @@
+import gzip
 import json
 import os
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, Dict, List
 
-import boto3
 from botocore.exceptions import ClientError
 
-s3 = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
+import aws_clients
+
+try:
+    import orjson  # optional: faster, serializes straight to UTF-8 bytes
+except ImportError:
+    orjson = None
+
+s3 = aws_clients.S3
+ddb = aws_clients.DDB
 
 JOB_TABLE = os.environ.get("JOB_TABLE", "IngestJobs")
 MANIFEST_BUCKET = os.environ.get("MANIFEST_BUCKET")  # if empty, defaults to impl.s3.bucket
 RULESET_VERSION_DEFAULT = os.environ.get("RULESET_VERSION", "v1.0")
 
-table = dynamodb.Table(JOB_TABLE)
-
 
 def utc_now_iso() -> str:
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 
-def get_in(d: Dict[str, Any], path: str) -> Optional[Any]:
+def serialize_manifest(manifest: Dict[str, Any]) -> bytes:
     """
-    Tiny safe getter: get_in(event, "validate_result.inventory")
+    Compact UTF-8 JSON, gzip'd (level 1: cheap CPU, most of the size win).
     """
-    cur: Any = d
-    for part in path.split("."):
-        if not isinstance(cur, dict) or part not in cur:
-            return None
-        cur = cur[part]
-    return cur
+    if orjson is not None:
+        raw = orjson.dumps(manifest, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        raw = json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return gzip.compress(raw, compresslevel=1)
 
 
 def handler(event, context):
@@ -40,9 +44,14 @@ def handler(event, context):
     if not job_id or not project_code:
         raise ValueError("Missing required fields: job_id and project_code")
 
+    # ---- Nested inputs (bound once) ----
+    impl_s3 = (event.get("impl") or {}).get("s3") or {}
+    policy = event.get("policy") or {}
+    validate_result = event.get("validate_result") or {}
+
     # ---- S3 location inputs ----
-    bucket = get_in(event, "impl.s3.bucket") or event.get("bucket")
-    prefix = get_in(event, "impl.s3.prefix") or event.get("folder_path") or get_in(event, "impl.s3.folder_path")
+    bucket = impl_s3.get("bucket") or event.get("bucket")
+    prefix = impl_s3.get("prefix") or event.get("folder_path") or impl_s3.get("folder_path")
 
     if not bucket or prefix is None:
         raise ValueError("Missing required S3 location: impl.s3.bucket and impl.s3.prefix (or folder_path)")
@@ -54,16 +63,16 @@ def handler(event, context):
     ingest_folder_uri = f"s3://{bucket}/{prefix}"
 
     # ---- Policy ----
-    ruleset_version = get_in(event, "policy.ruleset_version") or event.get("ruleset_version") or RULESET_VERSION_DEFAULT
+    ruleset_version = policy.get("ruleset_version") or event.get("ruleset_version") or RULESET_VERSION_DEFAULT
 
     # ---- Validation output ----
     inventory = (
-        get_in(event, "validate_result.inventory")
+        validate_result.get("inventory")
         or event.get("inventory")
         or []
     )
     stats = (
-        get_in(event, "validate_result.stats")
+        validate_result.get("stats")
         or event.get("stats")
         or {}
     )
@@ -74,7 +83,7 @@ def handler(event, context):
     # ---- Timestamps / state ----
     created_at = utc_now_iso()
     validated_at = (
-        get_in(event, "validate_result.validated_at")
+        validate_result.get("validated_at")
         or event.get("validated_at")
         or created_at
     )
@@ -107,8 +116,9 @@ def handler(event, context):
         s3.put_object(
             Bucket=out_bucket,
             Key=manifest_key,
-            Body=json.dumps(manifest, ensure_ascii=False, separators=(",", ":"), sort_keys=False).encode("utf-8"),
+            Body=serialize_manifest(manifest),
             ContentType="application/json",
+            ContentEncoding="gzip",
         )
     except ClientError as e:
         raise RuntimeError(f"Failed to write manifest to {manifest_s3_uri}: {e}") from e
@@ -116,14 +126,15 @@ def handler(event, context):
     # ---- Update DynamoDB (recommended) ----
     # Store pointer so you can find it without scanning S3
     try:
-        table.update_item(
-            Key={"job_id": job_id},
+        ddb.update_item(
+            TableName=JOB_TABLE,
+            Key={"job_id": {"S": job_id}},
             UpdateExpression="SET manifest_s3_uri = :u, manifest_bucket = :b, manifest_key = :k, updated_at = :t",
             ExpressionAttributeValues={
-                ":u": manifest_s3_uri,
-                ":b": out_bucket,
-                ":k": manifest_key,
-                ":t": created_at
+                ":u": {"S": manifest_s3_uri},
+                ":b": {"S": out_bucket},
+                ":k": {"S": manifest_key},
+                ":t": {"S": created_at}
             },
         )
     except ClientError as e:
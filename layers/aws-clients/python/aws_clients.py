@@ -0,0 +1,62 @@
+"""
+Shared boto3 clients for the ingest Lambdas (deployed as a Lambda layer).
+
+All clients come from one boto3 Session with one Config, so endpoint data,
+service models and credentials are resolved once per container. Clients are
+created on first use and cached; importing a name at module level in a
+handler (``from aws_clients import DDB``) creates it during Lambda INIT.
+
+    DDB  -> dynamodb
+    S3   -> s3
+    SFN  -> stepfunctions
+"""
+
+import threading
+from typing import Any, Dict, Tuple
+
+import boto3
+from botocore.config import Config
+
+CONFIG = Config(
+    retries={"max_attempts": 3, "mode": "standard"},
+    tcp_keepalive=True,
+    max_pool_connections=10,
+    connect_timeout=1,
+    read_timeout=3,
+)
+
+_session = boto3.session.Session()
+_clients: Dict[Tuple[str, int], Any] = {}
+# boto3 sessions are not thread-safe; handlers create clients from worker threads
+_lock = threading.Lock()
+
+_ALIASES = {
+    "DDB": "dynamodb",
+    "S3": "s3",
+    "SFN": "stepfunctions",
+}
+
+
+def get_client(service: str, max_pool_connections: int = 10) -> Any:
+    """
+    Cached client for service. Pass a larger max_pool_connections for
+    handlers that fan out requests on a thread pool.
+    """
+    key = (service, max_pool_connections)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                config = CONFIG
+                if max_pool_connections != CONFIG.max_pool_connections:
+                    config = CONFIG.merge(Config(max_pool_connections=max_pool_connections))
+                client = _session.client(service, config=config)
+                _clients[key] = client
+    return client
+
+
+def __getattr__(name: str) -> Any:
+    if name in _ALIASES:
+        return get_client(_ALIASES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")